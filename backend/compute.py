@@ -0,0 +1,204 @@
+"""Process-pool offload for CPU-bound risk computation.
+
+Simulation and other heavy per-request work must not run on the event loop,
+or a single ``/risk?mode=simulate`` call stalls ``/health`` and ``/users`` for
+every other client. ``ComputeExecutor`` runs such jobs in a pool of warm
+worker processes (Gold profiles and Sobol tables preloaded), bounds the number
+of admitted jobs, and cancels jobs whose client has gone away.
+
+Cancellation goes through a block of shared-memory flags, one per admission
+slot, so signalling a job is a plain memory write on the event loop rather
+than a round trip to a manager process.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from fastapi import Request
+
+import household
+import risk_store
+import simulation
+
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+class ComputeSaturated(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Compute queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+_cancel_flags = None
+
+
+class CancelFlag:
+    """Worker-side view of one admission slot's cancel flag.
+
+    Jobs only need ``is_set()``, matching ``threading.Event``.
+    """
+
+    def __init__(self, flags, slot: int):
+        self._flags = flags
+        self._slot = slot
+
+    def is_set(self) -> bool:
+        return bool(self._flags[self._slot])
+
+
+def _warm_worker(cancel_flags=None):
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+    risk_store.preload_profiles()
+    simulation.sobol_points(simulation.BATCH_POINTS, simulation.SOBOL_DIM)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _run_job(fn: Callable, slot: int, *args):
+    return fn(*args, CancelFlag(_cancel_flags, slot))
+
+
+def simulate_profile(profile_key: str, user_dict: dict, options: dict, cancel_event) -> Optional[tuple]:
+    """Worker job: simulated estimates and intervals for a user's Gold plans.
+
+    Returns ``(plans, summary)`` or ``None`` when the profile does not exist.
+    """
+    data = risk_store.load_profile(profile_key, "baseline")
+    if data is None:
+        return None
+    result = simulation.simulate_plan_metrics(user_dict, data, should_stop=cancel_event.is_set, **options)
+    summary = {k: result[k] for k in ("paths", "batches", "converged")}
+    return simulation.apply_simulation(data, result), summary
+
+
+def household_risk(members: list[dict], cancel_event) -> Optional[list[dict]]:
+    """Worker job: aggregate per-plan metrics for a household.
+
+    Returns ``None`` when a member has no Gold profile.
+    """
+    profiles = []
+    for member in members:
+        data = risk_store.load_profile(risk_store.match_demo_profile(member), "baseline")
+        if data is None:
+            return None
+        profiles.append(data)
+    return household.household_plan_metrics(members, profiles, should_stop=cancel_event.is_set)
+
+
+# ── Event-loop side ──────────────────────────────────────────────────────────
+
+class ComputeExecutor:
+    """Bounded process pool with admission control.
+
+    At most ``max_workers + max_queue`` jobs are admitted at once; beyond that
+    ``run`` raises ``ComputeSaturated`` with a Retry-After estimate derived from
+    recent job durations.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else 2 * self.max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cancel_flags = None
+        self._free_slots: list[int] = []
+        self._in_flight = 0
+        self._avg_seconds = 1.0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def start(self):
+        if self._pool is not None:
+            return
+        ctx = multiprocessing.get_context("spawn")
+        self._cancel_flags = ctx.RawArray("b", self.capacity)
+        self._free_slots = list(range(self.capacity))
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=ctx,
+            initializer=_warm_worker,
+            initargs=(self._cancel_flags,),
+        )
+        # Spawn every worker up front so the first requests don't pay for it.
+        for f in [self._pool.submit(_ping) for _ in range(self.max_workers)]:
+            f.result()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._cancel_flags = None
+
+    def retry_after(self) -> int:
+        backlog = self._in_flight - self.max_workers + 1
+        return max(1, round(self._avg_seconds * max(backlog, 1) / self.max_workers))
+
+    def _release(self, slot: int, elapsed: float):
+        if self._cancel_flags is not None:
+            self._cancel_flags[slot] = 0
+        self._free_slots.append(slot)
+        self._in_flight -= 1
+        self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    async def run(self, request: Request, fn: Callable, *args):
+        """Run ``fn(*args, cancel_event)`` in the pool on behalf of ``request``.
+
+        ``cancel_event.is_set()`` turns true in the worker once the client
+        disconnects; ``fn`` must be a module-level function so it pickles.
+        """
+        if self._pool is None:
+            raise RuntimeError("ComputeExecutor has not been started")
+        if self._in_flight >= self.capacity:
+            raise ComputeSaturated(self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        slot = self._free_slots.pop()
+        started = time.monotonic()
+        self._in_flight += 1
+        try:
+            future = self._pool.submit(_run_job, fn, slot, *args)
+        except BaseException:
+            self._free_slots.append(slot)
+            self._in_flight -= 1
+            raise
+        # The slot is held until the worker actually finishes, even if the
+        # client has already gone, so admission reflects real pool load and a
+        # set flag is never seen by the slot's next job.
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._release, slot, time.monotonic() - started)
+        )
+
+        wrapped = asyncio.wrap_future(future)
+        wrapped.add_done_callback(lambda f: f.cancelled() or f.exception())
+        while True:
+            done, _ = await asyncio.wait({wrapped}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return wrapped.result()
+            if await request.is_disconnected():
+                future.cancel()
+                self._cancel_flags[slot] = 1
+                raise ClientDisconnected()
+
+
+executor = ComputeExecutor(
+    max_workers=int(os.environ["COMPUTE_WORKERS"]) if os.getenv("COMPUTE_WORKERS") else None,
+    max_queue=int(os.environ["COMPUTE_QUEUE_SIZE"]) if os.getenv("COMPUTE_QUEUE_SIZE") else None,
+)
@@ -12,6 +12,7 @@ RISK_COLUMNS = [
     ("expected_er_visits", "REAL DEFAULT 0.0"),
     ("therapy_frequency", "REAL DEFAULT 0.0"),
     ("income_volatility", "TEXT"),
+    ("household_id", "TEXT"),
 ]
 
 
@@ -46,6 +47,7 @@ def create_tables():
         expected_er_visits REAL DEFAULT 0.0,
         therapy_frequency REAL DEFAULT 0.0,
         income_volatility TEXT,
+        household_id TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
@@ -67,6 +69,7 @@ class User:
         self.expected_er_visits = row["expected_er_visits"] or 0.0
         self.therapy_frequency = row["therapy_frequency"] or 0.0
         self.income_volatility = row["income_volatility"]
+        self.household_id = row["household_id"]
         self.created_at = row["created_at"]
         self.updated_at = row["updated_at"]
 
@@ -92,17 +95,20 @@ def create_user(
     expected_er_visits: float = 0.0,
     therapy_frequency: float = 0.0,
     income_volatility: str | None = None,
+    household_id: str | None = None,
 ) -> User:
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
         """
         INSERT INTO users (full_name, email, income_profile, coverage, county,
-                           medication_count, expected_er_visits, therapy_frequency, income_volatility)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                           medication_count, expected_er_visits, therapy_frequency, income_volatility,
+                           household_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (full_name, email, income_profile, coverage, county,
-         medication_count, expected_er_visits, therapy_frequency, income_volatility),
+         medication_count, expected_er_visits, therapy_frequency, income_volatility,
+         household_id),
     )
     conn.commit()
     user_id = cursor.lastrowid
@@ -125,6 +131,15 @@ def get_all_users() -> List[User]:
     return [User(row) for row in rows]
 
 
+def get_users_by_household(household_id: str) -> List[User]:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE household_id = ? ORDER BY id", (household_id,))
+    rows = cursor.fetchall()
+    conn.close()
+    return [User(row) for row in rows]
+
+
 def update_user(
     user_id: int,
     full_name: str = None,
@@ -135,6 +150,7 @@ def update_user(
     expected_er_visits: float = None,
     therapy_frequency: float = None,
     income_volatility: str = None,
+    household_id: str = None,
 ) -> Optional[User]:
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -150,6 +166,7 @@ def update_user(
         "expected_er_visits": expected_er_visits,
         "therapy_frequency": therapy_frequency,
         "income_volatility": income_volatility,
+        "household_id": household_id,
     }
 
     for col, val in field_map.items():
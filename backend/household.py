@@ -0,0 +1,235 @@
+"""Household annual-OOP distribution by FFT convolution.
+
+Each member's annual allowed spend is discretized on a common grid from the
+same frequency/severity cost model the simulator uses (``simulation``), then
+members are combined by convolving their probability mass functions with an
+FFT — O(n log n) in grid size per member, with no nested simulation. The
+family deductible, coinsurance and family OOP max are applied to the combined
+spend, and breach is the household's spend exceeding the family deductible.
+
+Family limits apply to aggregate household spend (non-embedded); per-member
+embedded limits would need the joint distribution and are not modelled. Net
+premiums are the members' subsidized individual Gold premiums summed, which
+only approximates what a family policy would cost.
+"""
+
+import cmath
+import itertools
+import math
+from bisect import bisect_left
+from typing import Callable, Optional
+
+from simulation import SEVERITY, SimulationCancelled, apply_cost_sharing, event_rates, plan_cost_sharing
+
+GRID_POINTS = 2048
+DISTRIBUTION_POINTS = 25
+# ACA family deductible and OOP limits are twice the self-only limits.
+FAMILY_LIMIT_MULTIPLIER = 2.0
+
+_SQRT2 = math.sqrt(2.0)
+
+
+# ── FFT ──────────────────────────────────────────────────────────────────────
+
+def _fft(a: list[complex], invert: bool = False) -> list[complex]:
+    """Iterative radix-2 FFT; ``len(a)`` must be a power of two."""
+    n = len(a)
+    a = list(a)
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            a[i], a[j] = a[j], a[i]
+
+    length = 2
+    sign = 1 if invert else -1
+    while length <= n:
+        w_len = cmath.exp(sign * 2j * math.pi / length)
+        half = length // 2
+        twiddles = [w_len ** k for k in range(half)]
+        for start in range(0, n, length):
+            for k in range(half):
+                u = a[start + k]
+                v = a[start + k + half] * twiddles[k]
+                a[start + k] = u + v
+                a[start + k + half] = u - v
+        length <<= 1
+
+    if invert:
+        a = [x / n for x in a]
+    return a
+
+
+def convolve(a: list[float], b: list[float], size: int) -> list[float]:
+    """Linear convolution of two PMFs, with mass past ``size - 1`` lumped into the last bin."""
+    n = 1
+    while n < len(a) + len(b) - 1:
+        n <<= 1
+    fa = _fft(a + [0.0] * (n - len(a)))
+    fb = _fft(b + [0.0] * (n - len(b)))
+    out = _fft([x * y for x, y in zip(fa, fb)], invert=True)
+
+    pmf = [max(x.real, 0.0) for x in out[: len(a) + len(b) - 1]]
+    head = pmf[:size]
+    head += [0.0] * (size - len(head))
+    head[-1] += sum(pmf[size:])
+    total = sum(head)
+    return [p / total for p in head]
+
+
+# ── Discretization ───────────────────────────────────────────────────────────
+
+def _category_pmf(rate: float, mu: float, sigma: float, log_edges: list[float], size: int) -> list[float]:
+    """PMF of N * Y on the grid, N ~ Poisson(rate), Y ~ LogNormal(mu, sigma)."""
+    pmf = [0.0] * size
+    weight = math.exp(-rate)
+    pmf[0] += weight
+    remaining = 1.0 - weight
+    n = 0
+    while remaining > 1e-10 and n < rate + 50 * math.sqrt(rate + 1):
+        n += 1
+        weight *= rate / n
+        remaining -= weight
+        if weight < 1e-14:
+            continue
+        shift = mu + math.log(n)
+        prev = 0.0
+        for k, log_edge in enumerate(log_edges):
+            cdf = 0.5 * (1.0 + math.erf((log_edge - shift) / (sigma * _SQRT2)))
+            pmf[k] += weight * (cdf - prev)
+            prev = cdf
+        pmf[-1] += weight * (1.0 - prev)
+    pmf[-1] += max(remaining, 0.0)
+    return pmf
+
+
+def member_spend_pmf(user_dict: dict, bin_width: float, size: int = GRID_POINTS) -> list[float]:
+    """Annual allowed spend PMF for one member on a grid of ``size`` bins of ``bin_width``."""
+    # Bin k holds spend in [(k - 0.5) h, (k + 0.5) h); the last bin is open-ended.
+    log_edges = [math.log((k + 0.5) * bin_width) for k in range(size - 1)]
+    rates = event_rates(user_dict)
+    pmf: Optional[list[float]] = None
+    for category, (mu, sigma) in SEVERITY.items():
+        if rates[category] <= 0:
+            continue
+        cat_pmf = _category_pmf(rates[category], mu, sigma, log_edges, size)
+        pmf = cat_pmf if pmf is None else convolve(pmf, cat_pmf, size)
+    if pmf is None:
+        pmf = [1.0] + [0.0] * (size - 1)
+    return pmf
+
+
+def family_limits(plan: dict, member_count: int) -> Optional[tuple[float, float, float]]:
+    """(family deductible, family OOP max, coinsurance) for a household on ``plan``.
+
+    Returns ``None`` when the plan record lacks a deductible or OOP max.
+    """
+    cost_sharing = plan_cost_sharing(plan)
+    if cost_sharing is None:
+        return None
+    deductible, oop_max, coinsurance = cost_sharing
+    multiplier = FAMILY_LIMIT_MULTIPLIER if member_count > 1 else 1.0
+    return deductible * multiplier, oop_max * multiplier, coinsurance
+
+
+def _cap_spend(deductible: float, oop_max: float, coinsurance: float) -> float:
+    """Allowed spend at which the OOP max is reached."""
+    if oop_max <= deductible:
+        return oop_max
+    return deductible + (oop_max - deductible) / coinsurance
+
+
+def _spend_cdf(cumulative: list[float], pmf: list[float], bin_width: float, x: float) -> float:
+    """P(spend <= x), interpolating linearly within bins."""
+    pos = min(max(x / bin_width + 0.5, 0.0), len(pmf) - 1.0)
+    k = int(pos)
+    below = cumulative[k - 1] if k else 0.0
+    return below + pmf[k] * (pos - k)
+
+
+def _spend_quantile(cumulative: list[float], pmf: list[float], bin_width: float, q: float) -> float:
+    """Spend quantile, interpolating linearly within bins."""
+    k = min(bisect_left(cumulative, q), len(pmf) - 1)
+    below = cumulative[k - 1] if k else 0.0
+    frac = (q - below) / pmf[k] if pmf[k] > 0 else 0.5
+    return max((k - 0.5 + min(max(frac, 0.0), 1.0)) * bin_width, 0.0)
+
+
+# ── Household metrics ────────────────────────────────────────────────────────
+
+def household_plan_metrics(
+    members: list[dict],
+    member_profiles: list[list[dict]],
+    size: int = GRID_POINTS,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> list[dict]:
+    """Aggregate risk metrics for a household on each plan.
+
+    ``members`` are risk-input dicts (as passed to ``match_demo_profile``) and
+    ``member_profiles`` each member's Gold plan records, in the same order.
+    Plans offered to every member, with a deductible and OOP max, are scored.
+    Above each plan's cap spend OOP is flat, so the grid only needs to reach
+    the largest cap and everything beyond is lumped into the last bin.
+    ``should_stop`` is polled between members and raises
+    ``SimulationCancelled`` when it returns true.
+    """
+    count = len(members)
+    by_member = [{p["plan_id"]: p for p in profile} for profile in member_profiles]
+    plans = [
+        plan for plan_id, plan in by_member[0].items()
+        if all(plan_id in member for member in by_member[1:])
+    ]
+    limits = {p["plan_id"]: family_limits(p, count) for p in plans}
+    plans = [p for p in plans if limits[p["plan_id"]] is not None]
+    if not plans:
+        return []
+    upper = max(_cap_spend(*limits[p["plan_id"]]) for p in plans)
+    bin_width = max(upper / (size - 1), 1.0)
+
+    spend_pmf: Optional[list[float]] = None
+    for member in members:
+        if should_stop is not None and should_stop():
+            raise SimulationCancelled()
+        pmf = member_spend_pmf(member, bin_width, size)
+        spend_pmf = pmf if spend_pmf is None else convolve(spend_pmf, pmf, size)
+    # OOP is non-decreasing in spend, so spend quantiles map to OOP quantiles.
+    cumulative = list(itertools.accumulate(spend_pmf))
+
+    results = []
+    for plan in plans:
+        deductible, oop_max, coinsurance = limits[plan["plan_id"]]
+
+        def oop_quantile(q: float) -> float:
+            spend = _spend_quantile(cumulative, spend_pmf, bin_width, q)
+            return apply_cost_sharing(spend, deductible, oop_max, coinsurance)
+
+        mean_oop = sum(
+            p * apply_cost_sharing(k * bin_width, deductible, oop_max, coinsurance)
+            for k, p in enumerate(spend_pmf)
+        )
+        breach = 1.0 - _spend_cdf(cumulative, spend_pmf, bin_width, deductible)
+        net_premium = sum(member[plan["plan_id"]]["net_premium"] for member in by_member)
+
+        cdf_points = []
+        for i in range(DISTRIBUTION_POINTS + 1):
+            q = min(i / DISTRIBUTION_POINTS, 0.998)
+            cdf_points.append({"cost": round(oop_quantile(q)), "cumulative_probability": round(q, 4)})
+
+        results.append({
+            "plan_id": plan["plan_id"],
+            "provider": plan.get("provider"),
+            "metal_tier": plan.get("metal_tier"),
+            "net_premium": round(net_premium, 2),
+            "family_deductible": round(deductible, 2),
+            "family_oop_max": round(oop_max, 2),
+            "breach_probability": round(breach, 4),
+            "mean_oop": round(mean_oop, 2),
+            "p90_exposure": round(oop_quantile(0.9), 2),
+            "expected_annual_total_cost": round(12 * net_premium + mean_oop, 2),
+            "distribution_points": cdf_points,
+        })
+    return results
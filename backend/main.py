@@ -1,6 +1,7 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import JSONResponse, Response
+from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
@@ -13,14 +14,19 @@ from database import (
     update_user,
     get_user_by_email,
     get_plans_by_county,
+    get_users_by_household,
     User as DBUser,
 )
 from schemas import (
     UserCreate, UserResponse, UserUpdate, PlanResponse,
-    RiskResponse, RiskPlanProfile,
+    RiskResponse, RiskPlanProfile, SimulationSummary,
     ShockRequest, ShockResponse, ShockPlanDelta,
+    HouseholdRiskResponse, HouseholdPlanRisk,
 )
 from risk_store import match_demo_profile, load_profile
+from simulation import METRICS, MIN_PATHS
+import wire
+from compute import executor, simulate_profile, household_risk, ComputeSaturated, ClientDisconnected
 
 app = FastAPI(title="UniVital API", version="0.2.0")
 
@@ -36,6 +42,26 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    executor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    executor.shutdown()
+
+
+async def _run_compute(request: Request, fn, *args):
+    """Run a CPU-bound job off the event loop, mapping pool errors to HTTP."""
+    try:
+        return await executor.run(request, fn, *args)
+    except ComputeSaturated as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Risk engine is busy, please retry",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client closed request")
 
 
 # ── Health ───────────────────────────────────────────────────────────────────
@@ -64,6 +90,7 @@ def _user_to_response(user: DBUser) -> UserResponse:
         expected_er_visits=user.expected_er_visits,
         therapy_frequency=user.therapy_frequency,
         income_volatility=user.income_volatility,
+        household_id=user.household_id,
         created_at=str(user.created_at),
         updated_at=str(user.updated_at),
     )
@@ -87,6 +114,7 @@ async def register_user(user: UserCreate):
         expected_er_visits=user.expected_er_visits,
         therapy_frequency=user.therapy_frequency,
         income_volatility=user.income_volatility,
+        household_id=user.household_id,
     )
     return _user_to_response(db_user)
 
@@ -119,6 +147,7 @@ async def update_user_endpoint(email: str, user_update: UserUpdate):
         expected_er_visits=user_update.expected_er_visits,
         therapy_frequency=user_update.therapy_frequency,
         income_volatility=user_update.income_volatility,
+        household_id=user_update.household_id,
     )
     return _user_to_response(updated_user)
 
@@ -148,8 +177,33 @@ async def get_plans(county: str):
 
 # ── Risk metrics ─────────────────────────────────────────────────────────────
 
-@app.get("/risk/{email}", response_model=RiskResponse)
-async def get_risk(email: str):
+@app.get("/risk/{email}", response_model=RiskResponse, response_model_exclude_none=True)
+async def get_risk(
+    request: Request,
+    http_response: Response,
+    email: str,
+    mode: str = "gold",
+    metrics: str = "breach_probability,mean_oop,p90_exposure",
+    rel_tol: float = Query(0.02, description="Simulate mode: relative tolerance for dollar metrics, never below $1"),
+    prob_tol: float = Query(0.01, description="Simulate mode: absolute tolerance for breach probability"),
+    max_paths: int = 10_000,
+    fields: Optional[str] = None,
+    curve_points: Optional[int] = None,
+    layout: str = "rows",
+):
+    if layout not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail=f"Unknown response layout: {layout}")
+    if curve_points is not None and curve_points < 3:
+        raise HTTPException(status_code=400, detail="curve_points must be at least 3")
+    selected = None
+    if fields is not None:
+        selected = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = selected - set(RiskPlanProfile.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    media_type = wire.negotiate(request.headers.get("accept"))
+    msgpack_requested = media_type != wire.JSON_MEDIA_TYPE
+
     user = get_user_by_email(email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -162,16 +216,79 @@ async def get_risk(email: str):
         "county": user.county,
     }
     profile_key = match_demo_profile(user_dict)
-    data = load_profile(profile_key, "baseline")
-
-    if data is None:
-        raise HTTPException(status_code=404, detail=f"No risk profile found for key: {profile_key}")
 
-    return RiskResponse(
+    simulation = None
+    if mode == "simulate":
+        requested = tuple(m.strip() for m in metrics.split(",") if m.strip())
+        unknown = set(requested) - set(METRICS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown metrics: {', '.join(sorted(unknown))}")
+        if rel_tol <= 0 or prob_tol <= 0:
+            raise HTTPException(status_code=400, detail="rel_tol and prob_tol must be positive")
+        if max_paths < MIN_PATHS:
+            raise HTTPException(status_code=400, detail=f"max_paths must be at least {MIN_PATHS}")
+        options = {"metrics": requested, "rel_tol": rel_tol, "prob_tol": prob_tol, "max_paths": max_paths}
+        result = await _run_compute(request, simulate_profile, profile_key, user_dict, options)
+        if result is None:
+            raise HTTPException(status_code=404, detail=f"No risk profile found for key: {profile_key}")
+        data, summary = result
+        simulation = SimulationSummary(**summary)
+    elif mode == "gold":
+        data = load_profile(profile_key, "baseline")
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"No risk profile found for key: {profile_key}")
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown risk mode: {mode}")
+
+    response = RiskResponse(
         profile_key=profile_key,
         county=user.county,
         annual_income=user.income_profile,
         plans=[RiskPlanProfile(**p) for p in data],
+        simulation=simulation,
+    )
+    # The body's encoding depends on Accept, so caches must key on it.
+    if selected is None and curve_points is None and layout == "rows" and not msgpack_requested:
+        http_response.headers["Vary"] = "Accept"
+        return response
+
+    payload = wire.encode_risk_response(
+        response.model_dump(exclude_none=True),
+        fields=selected,
+        curve_points=curve_points,
+        columnar=layout == "columnar",
+    )
+    if msgpack_requested:
+        return Response(content=wire.pack(payload), media_type=media_type, headers={"Vary": "Accept"})
+    return JSONResponse(content=payload, headers={"Vary": "Accept"})
+
+
+# ── Household risk ───────────────────────────────────────────────────────────
+
+@app.get("/households/{household_id}/risk", response_model=HouseholdRiskResponse)
+async def get_household_risk(request: Request, household_id: str):
+    members = get_users_by_household(household_id)
+    if not members:
+        raise HTTPException(status_code=404, detail="Household not found")
+
+    member_dicts = [
+        {
+            "income_profile": m.income_profile,
+            "medication_count": m.medication_count,
+            "expected_er_visits": m.expected_er_visits,
+            "therapy_frequency": m.therapy_frequency,
+            "county": m.county,
+        }
+        for m in members
+    ]
+    plans = await _run_compute(request, household_risk, member_dicts)
+    if plans is None:
+        raise HTTPException(status_code=404, detail="No risk profile found for one or more household members")
+
+    return HouseholdRiskResponse(
+        household_id=household_id,
+        members=[m.email for m in members],
+        plans=[HouseholdPlanRisk(**p) for p in plans],
     )
 
 
@@ -1,9 +1,21 @@
+import copy
 import json
 import os
 from typing import Optional
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
+# Raw Gold exports keyed by filename; filled by preload_profiles() in
+# long-lived compute workers so jobs don't re-read JSON from disk.
+_PROFILE_CACHE: dict[str, list] = {}
+
+
+def preload_profiles():
+    for filename in os.listdir(DATA_DIR):
+        if filename.endswith(".json"):
+            with open(os.path.join(DATA_DIR, filename), "r") as f:
+                _PROFILE_CACHE[filename] = json.load(f)
+
 
 def match_demo_profile(user_dict: dict) -> str:
     points = 0
@@ -79,12 +91,15 @@ def load_profile(profile_key: str, scenario: str = "baseline") -> Optional[list]
     else:
         filename = f"{profile_key}__{scenario}.json"
 
-    path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
-        return None
+    if filename in _PROFILE_CACHE:
+        data = copy.deepcopy(_PROFILE_CACHE[filename])
+    else:
+        path = os.path.join(DATA_DIR, filename)
+        if not os.path.exists(path):
+            return None
 
-    with open(path, "r") as f:
-        data = json.load(f)
+        with open(path, "r") as f:
+            data = json.load(f)
 
     for plan in data:
         if "expected_annual_total_cost" not in plan:
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 
 class UserBase(BaseModel):
@@ -12,6 +12,7 @@ class UserBase(BaseModel):
     expected_er_visits: float = 0.0
     therapy_frequency: float = 0.0
     income_volatility: Optional[str] = None
+    household_id: Optional[str] = None
 
 
 class UserCreate(UserBase):
@@ -27,6 +28,7 @@ class UserUpdate(BaseModel):
     expected_er_visits: Optional[float] = None
     therapy_frequency: Optional[float] = None
     income_volatility: Optional[str] = None
+    household_id: Optional[str] = None
 
 
 class UserResponse(UserBase):
@@ -68,6 +70,13 @@ class DistributionPoint(BaseModel):
     cumulative_probability: float
 
 
+class MetricInterval(BaseModel):
+    estimate: float
+    lower: float
+    upper: float
+    half_width: float
+
+
 class RiskPlanProfile(BaseModel):
     plan_id: str
     provider: Optional[str] = None
@@ -87,6 +96,13 @@ class RiskPlanProfile(BaseModel):
     base_premium: Optional[float] = None
     premium_fragility_curve: List[FragilityCurvePoint] = []
     distribution_points: List[DistributionPoint] = []
+    confidence_intervals: Optional[Dict[str, MetricInterval]] = None
+
+
+class SimulationSummary(BaseModel):
+    paths: int
+    batches: int
+    converged: bool
 
 
 class RiskResponse(BaseModel):
@@ -94,6 +110,27 @@ class RiskResponse(BaseModel):
     county: Optional[str] = None
     annual_income: Optional[float] = None
     plans: List[RiskPlanProfile]
+    simulation: Optional[SimulationSummary] = None
+
+
+class HouseholdPlanRisk(BaseModel):
+    plan_id: str
+    provider: Optional[str] = None
+    metal_tier: Optional[str] = None
+    net_premium: float
+    family_deductible: float
+    family_oop_max: float
+    breach_probability: float
+    mean_oop: float
+    p90_exposure: float
+    expected_annual_total_cost: float
+    distribution_points: List[DistributionPoint] = []
+
+
+class HouseholdRiskResponse(BaseModel):
+    household_id: str
+    members: List[str]
+    plans: List[HouseholdPlanRisk]
 
 
 class ShockRequest(BaseModel):
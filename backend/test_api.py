@@ -66,6 +66,49 @@ def test_policy_query_stub():
     print(f"   Status: {r.status_code}  Body: {r.json()}\n")
 
 
+def test_risk_simulate(email: str):
+    print(f"10. GET /risk/{email}?mode=simulate")
+    r = requests.get(f"{BASE_URL}/risk/{email}", params={"mode": "simulate", "rel_tol": 0.01})
+    body = r.json()
+    print(f"   Status: {r.status_code}  Simulation: {body.get('simulation')}")
+    for plan in body.get("plans", []):
+        ci = plan["confidence_intervals"]["mean_oop"]
+        print(f"   {plan['plan_id']}: Gold mean_oop {plan['mean_oop']}  simulated {ci['estimate']} [{ci['lower']}, {ci['upper']}]")
+    print()
+
+
+def test_household_risk(email: str):
+    print("11. GET /households/demo-household/risk")
+    requests.put(f"{BASE_URL}/users/{email}", json={"household_id": "demo-household"})
+    requests.post(f"{BASE_URL}/users", json={
+        "full_name": "John Doe",
+        "email": "john.doe@example.com",
+        "income_profile": 24000.0,
+        "coverage": "family",
+        "county": "Fulton",
+        "household_id": "demo-household",
+    })
+    r = requests.get(f"{BASE_URL}/households/demo-household/risk")
+    body = r.json()
+    print(f"   Status: {r.status_code}  Members: {body.get('members')}")
+    for plan in body.get("plans", []):
+        print(f"   {plan['plan_id']}: mean_oop {plan['mean_oop']}  p90 {plan['p90_exposure']}  family OOP max {plan['family_oop_max']}")
+    print()
+
+
+def test_risk_compact(email: str):
+    print(f"12. GET /risk/{email}?fields=...&layout=columnar")
+    params = {"fields": "net_premium,p90_exposure,premium_fragility_curve", "curve_points": 5, "layout": "columnar"}
+    r = requests.get(f"{BASE_URL}/risk/{email}", params=params)
+    body = r.json()
+    print(f"   Status: {r.status_code}  Vary: {r.headers.get('vary')}  Layout: {body.get('layout')}")
+    for plan in body.get("plans", []):
+        print(f"   {plan['plan_id']}: {sorted(plan)}  incomes {plan['premium_fragility_curve']['income']}")
+    r = requests.get(f"{BASE_URL}/risk/{email}", params=params,
+                     headers={"Accept": "application/msgpack, application/json;q=0.5"})
+    print(f"   msgpack preferred -> {r.status_code} {r.headers.get('content-type')} ({len(r.content)} bytes)\n")
+
+
 if __name__ == "__main__":
     print("=== UniVital API Tests ===\n")
     test_health()
@@ -81,3 +124,6 @@ if __name__ == "__main__":
     test_risk_stub()
     test_shock_stub()
     test_policy_query_stub()
+    test_risk_simulate(email)
+    test_household_risk(email)
+    test_risk_compact(email)
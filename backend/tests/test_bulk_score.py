@@ -0,0 +1,117 @@
+import csv
+import glob
+import importlib.util
+import json
+import os
+import shutil
+import sqlite3
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "bulk_score.py")
+
+
+def _load_script():
+    spec = importlib.util.spec_from_file_location("bulk_score", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    # Pool workers unpickle score_chunk by module name.
+    sys.modules["bulk_score"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+bulk_score = _load_script()
+
+USERS = [
+    (
+        i,
+        f"user{i}@example.com",
+        12000 + 1500 * (i % 9),
+        "Cobb" if i % 7 == 0 else "Fulton",
+        i % 3,
+        0.5 * (i % 2),
+        [0.0, 1.0][i % 4 == 0],
+    )
+    for i in range(1, 61)
+]
+
+
+def _create_db(path, users):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, email TEXT, income_profile REAL, "
+        "county TEXT, medication_count INTEGER, expected_er_visits REAL, therapy_frequency REAL)"
+    )
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?)", users)
+    conn.commit()
+    conn.close()
+
+
+def _read_output(out_dir):
+    rows = []
+    for path in sorted(glob.glob(os.path.join(out_dir, "part-*.csv"))):
+        with open(path, newline="") as f:
+            rows.extend(list(csv.reader(f))[1:])
+    return rows
+
+
+def _read_checkpoint(out_dir):
+    with open(os.path.join(out_dir, bulk_score.CHECKPOINT_FILE)) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("mode", ["gold", "simulate"])
+def test_resumed_run_matches_uninterrupted_run(tmp_path, mode):
+    full_db = str(tmp_path / "full.db")
+    _create_db(full_db, USERS)
+    bulk_score.run(full_db, str(tmp_path / "full"), mode, chunk_size=10, workers=1)
+
+    # A run that committed the first 20 users, then died while writing
+    # later parts; the rest of the users were registered afterwards.
+    db = str(tmp_path / "users.db")
+    out = str(tmp_path / "resumed")
+    _create_db(db, USERS[:20])
+    bulk_score.run(db, out, mode, chunk_size=10, workers=1)
+    with open(os.path.join(out, "part-00006.csv"), "w") as f:
+        f.write("user_id,email\n999,stale@example.com\n")
+    with open(os.path.join(out, "part-00009.csv.tmp"), "w") as f:
+        f.write("user_id")
+    _create_db(db, USERS[20:])
+    bulk_score.run(db, out, mode, chunk_size=10, workers=1)
+
+    assert _read_output(out) == _read_output(str(tmp_path / "full"))
+    assert not glob.glob(os.path.join(out, "*.tmp"))
+    resumed, full = _read_checkpoint(out), _read_checkpoint(str(tmp_path / "full"))
+    for key in ("last_id", "next_part", "users", "unscored", "rows"):
+        assert resumed[key] == full[key]
+
+
+def test_users_outside_demo_counties_are_counted_not_scored(tmp_path):
+    db = str(tmp_path / "users.db")
+    _create_db(db, USERS)
+    bulk_score.run(db, str(tmp_path / "out"), "gold", chunk_size=25, workers=1)
+
+    cobb = {str(u[0]) for u in USERS if u[3] == "Cobb"}
+    scored = {row[0] for row in _read_output(str(tmp_path / "out"))}
+    assert scored.isdisjoint(cobb)
+    assert scored == {str(u[0]) for u in USERS} - cobb
+    checkpoint = _read_checkpoint(str(tmp_path / "out"))
+    assert checkpoint["users"] == len(USERS)
+    assert checkpoint["unscored"] == len(cobb)
+
+
+def test_resume_refuses_different_mode_or_database(tmp_path):
+    db = str(tmp_path / "users.db")
+    _create_db(db, USERS[:10])
+    out = str(tmp_path / "out")
+    bulk_score.run(db, out, "gold", chunk_size=10, workers=1)
+
+    with pytest.raises(SystemExit, match="'gold' mode"):
+        bulk_score.run(db, out, "simulate", chunk_size=10, workers=1)
+
+    other = str(tmp_path / "other.db")
+    shutil.copy(db, other)
+    with pytest.raises(SystemExit, match="written from"):
+        bulk_score.run(other, out, "gold", chunk_size=10, workers=1)
+    assert _read_checkpoint(out)["db"] == os.path.abspath(db)
@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import compute
+from simulation import SimulationCancelled
+
+MID_RISK = {
+    "state": "GA",
+    "county": "Fulton",
+    "age": 40,
+    "annual_income": 45000,
+    "household_size": 1,
+    "medication_count": 2,
+    "expected_er_visits": 0.5,
+    "therapy_frequency": 1.0,
+}
+
+
+class FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+def wait_for_cancel(cancel_event):
+    """Pool job that holds its worker until the client goes away."""
+    deadline = time.monotonic() + 30
+    while not cancel_event.is_set():
+        if time.monotonic() > deadline:
+            return "timed out"
+        time.sleep(0.01)
+    raise SimulationCancelled()
+
+
+def echo(value, cancel_event):
+    return value
+
+
+@pytest.fixture(scope="module")
+def executor():
+    ex = compute.ComputeExecutor(max_workers=1, max_queue=3)
+    ex.start()
+    yield ex
+    ex.shutdown()
+
+
+@pytest.fixture
+def submitted(executor, monkeypatch):
+    """Pool futures in submission order."""
+    futures = []
+    submit = executor._pool.submit
+
+    def recording_submit(*args):
+        futures.append(submit(*args))
+        return futures[-1]
+
+    monkeypatch.setattr(executor._pool, "submit", recording_submit)
+    return futures
+
+
+async def _until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_run_returns_job_result_and_releases_slot(executor):
+    async def scenario():
+        assert await executor.run(FakeRequest(), echo, 42) == 42
+        await _until(lambda: executor.in_flight == 0)
+
+    asyncio.run(scenario())
+
+
+def test_admission_at_capacity_and_cancel_on_disconnect(executor, submitted):
+    async def scenario():
+        requests = [FakeRequest() for _ in range(executor.capacity)]
+        tasks = [asyncio.create_task(executor.run(r, wait_for_cancel)) for r in requests]
+        await _until(lambda: len(submitted) == executor.capacity)
+        await _until(submitted[0].running)
+        assert executor.in_flight == executor.capacity
+
+        with pytest.raises(compute.ComputeSaturated) as exc:
+            await executor.run(FakeRequest(), echo, 1)
+        assert exc.value.retry_after >= 1
+
+        # With one worker busy, the last job has not been handed to a worker
+        # yet and is cancelled outright.
+        requests[-1].disconnected = True
+        with pytest.raises(compute.ClientDisconnected):
+            await tasks[-1]
+        assert submitted[-1].cancelled()
+
+        # The running job only stops when it sees its cancel flag.
+        for request in requests[:-1]:
+            request.disconnected = True
+        for task in tasks[:-1]:
+            with pytest.raises(compute.ClientDisconnected):
+                await task
+        assert isinstance(submitted[0].exception(timeout=10), SimulationCancelled)
+        for future in submitted[1:-1]:
+            assert future.cancelled() or isinstance(future.exception(timeout=10), SimulationCancelled)
+
+        await _until(lambda: executor.in_flight == 0)
+        assert sorted(executor._free_slots) == list(range(executor.capacity))
+        assert not any(executor._cancel_flags)
+        assert await executor.run(FakeRequest(), echo, "admitted") == "admitted"
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_stops_simulation_in_worker(executor, submitted):
+    options = {"rel_tol": 1e-6, "prob_tol": 1e-6, "max_paths": 10_000_000}
+
+    async def scenario():
+        request = FakeRequest()
+        task = asyncio.create_task(
+            executor.run(request, compute.simulate_profile, "profile_lowrisk_fulton", MID_RISK, options)
+        )
+        await _until(lambda: submitted and submitted[0].running())
+        request.disconnected = True
+        with pytest.raises(compute.ClientDisconnected):
+            await task
+        assert isinstance(submitted[0].exception(timeout=30), SimulationCancelled)
+        await _until(lambda: executor.in_flight == 0)
+
+    asyncio.run(scenario())
+
+
+def test_saturation_maps_to_429_with_retry_after(monkeypatch):
+    pytest.importorskip("dotenv")
+    import main
+
+    class Saturated:
+        async def run(self, request, fn, *args):
+            raise compute.ComputeSaturated(7)
+
+    monkeypatch.setattr(main, "executor", Saturated())
+    with pytest.raises(main.HTTPException) as exc:
+        asyncio.run(main._run_compute(FakeRequest(), echo, 1))
+    assert exc.value.status_code == 429
+    assert exc.value.headers == {"Retry-After": "7"}
@@ -0,0 +1,88 @@
+import copy
+import json
+import os
+
+import pytest
+
+import household
+import simulation
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+LOW_RISK = {"medication_count": 0, "expected_er_visits": 0.0, "therapy_frequency": 0.0}
+MID_RISK = {"medication_count": 1, "expected_er_visits": 0.5, "therapy_frequency": 1.0}
+
+
+def _load(name):
+    with open(os.path.join(DATA_DIR, f"{name}.json"), "r") as f:
+        return json.load(f)
+
+
+def test_fft_convolution_matches_direct_and_conserves_mass():
+    a = [0.1, 0.2, 0.3, 0.4]
+    b = [0.5, 0.25, 0.25]
+    direct = [0.0] * 6
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            direct[i + j] += x * y
+    assert household.convolve(a, b, 6) == pytest.approx(direct, abs=1e-12)
+
+    # Truncating to 4 bins folds the tail into the last one.
+    folded = household.convolve(a, b, 4)
+    assert sum(folded) == pytest.approx(1.0, abs=1e-12)
+    assert folded[-1] == pytest.approx(direct[3] + direct[4] + direct[5], abs=1e-12)
+
+
+def test_member_spend_pmf_conserves_mass():
+    pmf = household.member_spend_pmf(MID_RISK, bin_width=10.0, size=1024)
+    assert sum(pmf) == pytest.approx(1.0, abs=1e-9)
+    assert min(pmf) >= 0.0
+
+
+@pytest.mark.parametrize("member", [LOW_RISK, MID_RISK])
+def test_single_member_household_matches_simulator(member):
+    plans = _load("profile_lowrisk_fulton")
+    results = household.household_plan_metrics([member], [plans])
+    sim = simulation.simulate_plan_metrics(member, plans, rel_tol=0.005, prob_tol=0.005, max_paths=60_000)
+    for result in results:
+        intervals = sim["plans"][result["plan_id"]]["intervals"]
+        for metric in ("breach_probability", "mean_oop", "p90_exposure"):
+            ci = intervals[metric]
+            assert ci["lower"] - 0.01 <= result[metric] <= ci["upper"] + 0.01, (result["plan_id"], metric)
+
+
+def test_family_limits_are_applied_to_combined_spend(monkeypatch):
+    plans = _load("profile_lowrisk_fulton")
+    single = {r["plan_id"]: r for r in household.household_plan_metrics([MID_RISK], [plans])}
+    couple = household.household_plan_metrics([MID_RISK, MID_RISK], [plans, plans])
+    monkeypatch.setattr(household, "FAMILY_LIMIT_MULTIPLIER", 1.0)
+    individual_limits = {
+        r["plan_id"]: r for r in household.household_plan_metrics([MID_RISK, MID_RISK], [plans, plans])
+    }
+    for result, plan in zip(couple, plans):
+        assert result["family_deductible"] == 2 * plan["deductible"]
+        assert result["family_oop_max"] == 2 * plan["oop_max"]
+        assert result["net_premium"] == pytest.approx(2 * plan["net_premium"], abs=0.01)
+        # The same combined spend breaches a family deductible less often
+        # than a self-only one, and pays more before hitting the family cap.
+        tighter = individual_limits[plan["plan_id"]]
+        assert result["breach_probability"] < tighter["breach_probability"]
+        assert result["mean_oop"] > tighter["mean_oop"]
+        # Cost sharing is concave in spend, so pooling two members against
+        # doubled limits never pays less than the two of them separately.
+        assert 2 * single[plan["plan_id"]]["mean_oop"] - 1 <= result["mean_oop"] <= result["family_oop_max"]
+        costs = [p["cost"] for p in result["distribution_points"]]
+        assert costs == sorted(costs)
+        assert costs[-1] <= result["family_oop_max"]
+
+
+def test_plan_at_oop_max_p90_and_plan_without_limits():
+    plans = _load("profile_highrisk_fulton")
+    edited = copy.deepcopy(plans)
+    edited[3]["p90_exposure"] = edited[3]["oop_max"]
+    del edited[1]["oop_max"]
+
+    results = household.household_plan_metrics([MID_RISK, LOW_RISK], [edited, plans])
+    plan_ids = [r["plan_id"] for r in results]
+    assert edited[3]["plan_id"] in plan_ids
+    assert edited[1]["plan_id"] not in plan_ids
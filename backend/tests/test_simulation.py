@@ -0,0 +1,166 @@
+import copy
+import glob
+import json
+import math
+import os
+import random
+
+import pytest
+
+import simulation
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+PROFILES = sorted(glob.glob(os.path.join(DATA_DIR, "profile_*.json")))
+
+LOW_RISK = {"medication_count": 0, "expected_er_visits": 0.0, "therapy_frequency": 0.0}
+HIGH_RISK = {"medication_count": 3, "expected_er_visits": 1.0, "therapy_frequency": 2.0}
+
+
+def _load(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _cells(points, shape):
+    return {
+        tuple(int(p[d] / simulation._SOBOL_SCALE * n) for d, n in enumerate(shape))
+        for p in points
+    }
+
+
+def test_sobol_points_are_a_net():
+    # Every elementary box of volume 1/16 holds exactly one of the first 16
+    # points: the (0, 4, 2)-net property of Joe–Kuo dimensions 1 and 2.
+    assert len(_cells(simulation.sobol_points(16, 1), [16])) == 16
+    points = simulation.sobol_points(16, 2)
+    for k in range(5):
+        assert len(_cells(points, [1 << k, 1 << (4 - k)])) == 16
+
+
+def test_sobol_direction_numbers_match_joe_kuo():
+    directions = simulation._direction_numbers(3)
+    top = [[v >> (simulation._SOBOL_BITS - 4) for v in d[:4]] for d in directions]
+    # m_k * 2^(4 - k) for the first four direction numbers.
+    assert top[0] == [8, 4, 2, 1]
+    assert top[1] == [8, 12, 10, 15]
+    assert top[2] == [8, 12, 6, 9]
+
+
+@pytest.mark.parametrize("user", [LOW_RISK, {**LOW_RISK, "medication_count": 1}])
+def test_control_variate_reduces_batch_variance(user):
+    plan = _load(PROFILES[0])[0]
+    cost_sharing = simulation.plan_cost_sharing(plan)
+    rates = simulation.event_rates(user)
+    categories = [(simulation._poisson_cdf(rates[c]), *simulation.SEVERITY[c]) for c in simulation.SEVERITY]
+    control_mean = sum(simulation.expected_category_oop(*c, cost_sharing) for c in categories)
+    points = simulation.sobol_points(simulation.BATCH_POINTS, simulation.SOBOL_DIM)
+
+    rng = random.Random(1)
+    plain, controlled = [], []
+    for _ in range(24):
+        shift = [rng.getrandbits(32) for _ in range(simulation.SOBOL_DIM)]
+        spend = simulation._batch_spend(points, shift, categories)
+        controlled.append(simulation._batch_metrics(spend, control_mean, plan, cost_sharing)["mean_oop"])
+        plain.append(sum(simulation.apply_cost_sharing(sum(p), *cost_sharing) for p in spend) / len(spend))
+
+    def var(xs):
+        m = sum(xs) / len(xs)
+        return sum((x - m) ** 2 for x in xs) / (len(xs) - 1)
+
+    assert var(controlled) < var(plain) / 3
+
+
+def test_expected_category_oop_matches_quadrature():
+    plan = _load(PROFILES[0])[0]
+    cost_sharing = simulation.plan_cost_sharing(plan)
+    mu, sigma = simulation.SEVERITY["er"]
+    cdf = simulation._poisson_cdf(1.5)
+    expected = 0.0
+    prev = 0.0
+    for n, cumulative in enumerate(cdf):
+        p, prev = cumulative - prev, cumulative
+        if n:
+            # midpoint rule over the normal quantiles of Y
+            steps = 20_000
+            expected += p * sum(
+                simulation.apply_cost_sharing(
+                    n * math.exp(mu + sigma * simulation._STD_NORMAL.inv_cdf((i + 0.5) / steps)), *cost_sharing
+                )
+                for i in range(steps)
+            ) / steps
+    assert simulation.expected_category_oop(cdf, mu, sigma, cost_sharing) == pytest.approx(expected, rel=1e-3)
+
+
+def test_intervals_cover_closed_form_values():
+    # With no deductible and an unreachable OOP max, OOP is coinsurance times
+    # spend (which the control variate recovers exactly) and breach is
+    # P(any event at all).
+    plan = {"plan_id": "open", "metal_tier": "Gold", "deductible": 0, "oop_max": 1e12, "net_premium": 100.0}
+    rates = simulation.event_rates(HIGH_RISK)
+    result = simulation.simulate_plan_metrics(HIGH_RISK, [plan], rel_tol=0.005, max_paths=40_000)
+    intervals = result["plans"]["open"]["intervals"]
+
+    mean = intervals["mean_oop"]
+    expected_spend = sum(
+        rates[c] * math.exp(mu + 0.5 * sigma * sigma) for c, (mu, sigma) in simulation.SEVERITY.items()
+    )
+    assert mean["estimate"] == pytest.approx(0.2 * expected_spend)
+    breach = intervals["breach_probability"]
+    assert breach["lower"] <= 1.0 - math.exp(-sum(rates.values())) <= breach["upper"]
+
+
+def test_stops_once_requested_metrics_are_within_tolerance():
+    plans = _load(PROFILES[0])
+    result = simulation.simulate_plan_metrics(LOW_RISK, plans, rel_tol=0.05, prob_tol=0.02)
+    assert result["converged"]
+    assert result["paths"] < 10_000
+    for per_plan in result["plans"].values():
+        per_metric = per_plan["intervals"]
+        assert per_metric["breach_probability"]["half_width"] <= 0.02
+        mean = per_metric["mean_oop"]
+        assert mean["half_width"] <= max(0.05 * mean["estimate"], simulation.MIN_DOLLAR_TOLERANCE)
+
+
+def test_estimates_follow_user_inputs():
+    plans = _load(PROFILES[0])
+    low = simulation.simulate_plan_metrics(LOW_RISK, plans)["plans"]
+    high = simulation.simulate_plan_metrics(HIGH_RISK, plans)["plans"]
+    for plan_id in low:
+        assert high[plan_id]["intervals"]["mean_oop"]["lower"] > low[plan_id]["intervals"]["mean_oop"]["upper"]
+
+
+def test_plan_at_oop_max_p90_and_plan_without_limits():
+    plans = _load(PROFILES[0])
+    capped = copy.deepcopy(plans)
+    capped[0]["p90_exposure"] = capped[0]["oop_max"]
+    del capped[1]["oop_max"]
+
+    result = simulation.simulate_plan_metrics(HIGH_RISK, capped)
+    assert capped[0]["plan_id"] in result["plans"]
+    assert capped[1]["plan_id"] not in result["plans"]
+    merged = simulation.apply_simulation(capped, result)
+    assert "confidence_intervals" not in merged[1]
+
+
+def test_apply_simulation_keeps_gold_fields():
+    plans = _load(PROFILES[0])
+    merged = simulation.apply_simulation(plans, simulation.simulate_plan_metrics(HIGH_RISK, plans))
+    for gold, plan in zip(plans, merged):
+        assert {k: v for k, v in plan.items() if k != "confidence_intervals"} == gold
+        assert set(plan["confidence_intervals"]) == set(simulation.METRICS)
+        ci = plan["confidence_intervals"]["breach_probability"]
+        assert 0.0 <= ci["lower"] <= ci["upper"] <= 1.0
+
+
+def test_max_paths_below_minimum_is_rejected():
+    plans = _load(PROFILES[0])
+    with pytest.raises(ValueError):
+        simulation.simulate_plan_metrics(LOW_RISK, plans, max_paths=simulation.MIN_PATHS - 1)
+    result = simulation.simulate_plan_metrics(LOW_RISK, plans, max_paths=simulation.MIN_PATHS, rel_tol=1e-6)
+    assert result["paths"] == simulation.MIN_PATHS
+
+
+def test_cancellation():
+    plans = _load(PROFILES[0])
+    with pytest.raises(simulation.SimulationCancelled):
+        simulation.simulate_plan_metrics(LOW_RISK, plans, should_stop=lambda: True)
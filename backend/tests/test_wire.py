@@ -0,0 +1,72 @@
+import pytest
+
+import risk_store
+import wire
+
+
+def _plans():
+    return risk_store.load_profile("profile_lowrisk_fulton", "baseline")
+
+
+@pytest.mark.parametrize("threshold", [3, 5, 10, 24])
+def test_lttb_keeps_endpoints_and_size(threshold):
+    xs = [float(i) for i in range(25)]
+    ys = [x * x if x < 12 else 200.0 - x for x in xs]
+    keep = wire.lttb(xs, ys, threshold)
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == len(xs) - 1
+    assert keep == sorted(set(keep))
+
+
+def test_lttb_short_input_and_bad_threshold():
+    assert wire.lttb([0.0, 1.0], [0.0, 1.0], 5) == [0, 1]
+    with pytest.raises(ValueError):
+        wire.lttb([0.0, 1.0, 2.0], [0.0, 1.0, 2.0], 2)
+
+
+def test_projection_and_columnar_round_trip():
+    plans = _plans()
+    encoded = wire.encode_risk_response(
+        {"profile_key": "profile_lowrisk_fulton", "plans": plans},
+        fields={"net_premium", "premium_fragility_curve", "distribution_points"},
+        columnar=True,
+    )
+    assert encoded["layout"] == "columnar"
+    for plan, compact in zip(plans, encoded["plans"]):
+        assert set(compact) == {"plan_id", "net_premium", "premium_fragility_curve", "distribution_points"}
+        for field, (_, attrs) in wire.CURVES.items():
+            columns = compact[field]
+            rows = [dict(zip(attrs, values)) for values in zip(*(columns[a] for a in attrs))]
+            assert rows == [{a: p[a] for a in attrs} for p in plan[field]]
+
+
+def test_downsample_keeps_curve_ends():
+    plan = wire.downsample_plan(_plans()[0], 5)
+    original = _plans()[0]
+    for field in wire.CURVES:
+        assert len(plan[field]) == min(5, len(original[field]))
+        assert plan[field][0] == original[field][0]
+        assert plan[field][-1] == original[field][-1]
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "application/json"),
+    ("application/json", "application/json"),
+    ("*/*", "application/json"),
+    ("text/html", "application/json"),
+    ("text/plain;q=0.5", "application/json"),
+    ("application/msgpack;q=0.5, application/json", "application/json"),
+    ("application/msgpack, application/json;q=0", "application/msgpack"),
+    ("application/msgpack, */*;q=0.1", "application/msgpack"),
+    ("application/x-msgpack, application/json;q=0.9", "application/x-msgpack"),
+    ("application/msgpack;q=0", "application/json"),
+])
+def test_negotiate(monkeypatch, accept, expected):
+    monkeypatch.setattr(wire, "msgpack", object())
+    assert wire.negotiate(accept) == expected
+
+
+def test_negotiate_falls_back_to_json_without_msgpack(monkeypatch):
+    monkeypatch.setattr(wire, "msgpack", None)
+    assert wire.negotiate("application/msgpack, application/json;q=0.5") == "application/json"
+    assert wire.negotiate("application/msgpack") == "application/json"
@@ -0,0 +1,181 @@
+"""Compact encodings for risk responses.
+
+``RiskResponse`` ships every plan's fragility curve and CDF as lists of
+per-point objects. Callers that only need a few numbers, or a coarser chart,
+can ask for less:
+
+* field projection — keep only the named plan fields (``plan_id`` is always
+  kept);
+* curve downsampling — Largest-Triangle-Three-Buckets, which keeps the points
+  that carry the curve's visual shape (cliffs, CDF knees) rather than sampling
+  uniformly;
+* columnar curves — one array per point attribute instead of repeated keys;
+* MessagePack — a binary body when the client's Accept header prefers
+  ``application/msgpack`` over JSON and the optional ``msgpack`` package is
+  installed.
+"""
+
+from typing import Optional
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Curve field -> (x attribute, y attribute) used for LTTB and the ordered list
+# of attributes emitted in columnar form.
+CURVES = {
+    "premium_fragility_curve": (
+        ("income", "net_premium"),
+        ("income", "net_premium", "subsidy", "fragility_slope", "discontinuity_flag"),
+    ),
+    "distribution_points": (
+        ("cost", "cumulative_probability"),
+        ("cost", "cumulative_probability"),
+    ),
+}
+
+
+def lttb(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    First and last points are always kept; the rest are split into
+    ``threshold - 2`` buckets and from each bucket the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average is chosen.
+    """
+    if threshold < 3:
+        raise ValueError("LTTB needs at least 3 output points")
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+
+    keep = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+
+        # The last bucket's "next bucket" is just the final point.
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[end:next_end]) / (next_end - end)
+        avg_y = sum(ys[end:next_end]) / (next_end - end)
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return keep
+
+
+def downsample_plan(plan: dict, max_points: int) -> dict:
+    plan = dict(plan)
+    for field, ((x, y), _) in CURVES.items():
+        points = plan.get(field)
+        if not points or len(points) <= max_points:
+            continue
+        keep = lttb([p[x] for p in points], [p[y] for p in points], max_points)
+        plan[field] = [points[i] for i in keep]
+    return plan
+
+
+def project_plan(plan: dict, fields: Optional[set[str]]) -> dict:
+    if fields is None:
+        return plan
+    return {k: v for k, v in plan.items() if k == "plan_id" or k in fields}
+
+
+def columnar_plan(plan: dict) -> dict:
+    plan = dict(plan)
+    for field, (_, attrs) in CURVES.items():
+        points = plan.get(field)
+        if points is not None:
+            plan[field] = {attr: [p[attr] for p in points] for attr in attrs}
+    return plan
+
+
+def encode_risk_response(
+    response: dict,
+    fields: Optional[set[str]] = None,
+    curve_points: Optional[int] = None,
+    columnar: bool = False,
+) -> dict:
+    """Apply projection, downsampling and columnar layout to a dumped RiskResponse."""
+    plans = []
+    for plan in response["plans"]:
+        plan = project_plan(plan, fields)
+        if curve_points is not None:
+            plan = downsample_plan(plan, curve_points)
+        if columnar:
+            plan = columnar_plan(plan)
+        plans.append(plan)
+    encoded = {**response, "plans": plans}
+    if columnar:
+        encoded["layout"] = "columnar"
+    return encoded
+
+
+def _accept_quality(ranges: list[tuple[str, float]], media_type: str) -> float:
+    """q-value the most specific matching media range gives ``media_type``."""
+    kind = media_type.split("/")[0]
+    best, best_specificity = 0.0, -1
+    for media_range, q in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{kind}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if specificity > best_specificity:
+            best, best_specificity = q, specificity
+    return best
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick ``JSON_MEDIA_TYPE`` or a MessagePack type for an Accept header.
+
+    MessagePack is chosen only when the client strictly prefers it to JSON and
+    the optional package is installed. Everything else gets JSON, including
+    Accept headers that rule out both, so clients that predate MessagePack
+    support keep working.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = (piece.strip() for piece in part.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_range:
+            ranges.append((media_range.lower(), q))
+
+    json_q = _accept_quality(ranges, JSON_MEDIA_TYPE)
+    if msgpack is not None:
+        msgpack_type = max(MSGPACK_MEDIA_TYPES, key=lambda t: _accept_quality(ranges, t))
+        if _accept_quality(ranges, msgpack_type) > json_q:
+            return msgpack_type
+    return JSON_MEDIA_TYPE
+
+
+def pack(payload: dict) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.packb(payload, use_bin_type=True)
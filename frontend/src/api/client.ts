@@ -1,7 +1,36 @@
-import type { RiskResponse, ShockResponse } from "../types/risk";
+import type {
+  ColumnarRiskPlanProfile,
+  ColumnarRiskResponse,
+  RiskPlanProfile,
+  RiskQueryOptions,
+  RiskResponse,
+  ShockResponse,
+} from "../types/risk";
 
 const API_BASE = import.meta.env.VITE_API_URL || "http://localhost:8000";
 
+export function expandColumnarPlan(plan: ColumnarRiskPlanProfile): Partial<RiskPlanProfile> {
+  const { premium_fragility_curve: curve, distribution_points: dist, ...rest } = plan;
+  return {
+    ...rest,
+    ...(curve && {
+      premium_fragility_curve: curve.income.map((income, i) => ({
+        income,
+        net_premium: curve.net_premium[i],
+        subsidy: curve.subsidy[i],
+        fragility_slope: curve.fragility_slope[i],
+        discontinuity_flag: curve.discontinuity_flag[i],
+      })),
+    }),
+    ...(dist && {
+      distribution_points: dist.cost.map((cost, i) => ({
+        cost,
+        cumulative_probability: dist.cumulative_probability[i],
+      })),
+    }),
+  };
+}
+
 export const api = {
   async registerUser(userData: {
     name: string;
@@ -70,6 +99,18 @@ export const api = {
     return res.json();
   },
 
+  async getRiskCompact(email: string, options: RiskQueryOptions = {}): Promise<ColumnarRiskResponse> {
+    const params = new URLSearchParams({ layout: "columnar" });
+    if (options.fields?.length) params.set("fields", options.fields.join(","));
+    if (options.curvePoints) params.set("curve_points", String(options.curvePoints));
+    const res = await fetch(`${API_BASE}/risk/${encodeURIComponent(email)}?${params}`);
+    if (!res.ok) {
+      const err = await res.json().catch(() => ({}));
+      throw new Error(err.detail || "Risk data unavailable");
+    }
+    return res.json();
+  },
+
   async runShock(email: string, scenarioType: string): Promise<ShockResponse> {
     const res = await fetch(`${API_BASE}/shock/${encodeURIComponent(email)}`, {
       method: "POST",
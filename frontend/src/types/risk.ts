@@ -21,6 +21,13 @@ export interface DistributionPoint {
   cumulative_probability: number;
 }
 
+export interface MetricInterval {
+  estimate: number;
+  lower: number;
+  upper: number;
+  half_width: number;
+}
+
 export interface RiskPlanProfile {
   plan_id: string;
   provider?: string;
@@ -41,6 +48,13 @@ export interface RiskPlanProfile {
   premium_fragility_curve: FragilityCurvePoint[];
   distribution_points?: DistributionPoint[];
   annual_cost_samples?: number[];
+  confidence_intervals?: Record<string, MetricInterval>;
+}
+
+export interface SimulationSummary {
+  paths: number;
+  batches: number;
+  converged: boolean;
 }
 
 export interface RiskResponse {
@@ -48,6 +62,7 @@ export interface RiskResponse {
   county?: string;
   annual_income?: number;
   plans: RiskPlanProfile[];
+  simulation?: SimulationSummary;
 }
 
 export interface ShockPlanDelta {
@@ -68,3 +83,52 @@ export interface ShockResponse {
   scenario_type: string;
   results: ShockPlanDelta[];
 }
+
+export interface HouseholdPlanRisk {
+  plan_id: string;
+  provider?: string;
+  metal_tier?: string;
+  net_premium: number;
+  family_deductible: number;
+  family_oop_max: number;
+  breach_probability: number;
+  mean_oop: number;
+  p90_exposure: number;
+  expected_annual_total_cost: number;
+  distribution_points: DistributionPoint[];
+}
+
+export interface HouseholdRiskResponse {
+  household_id: string;
+  members: string[];
+  plans: HouseholdPlanRisk[];
+}
+
+export interface ColumnarFragilityCurve {
+  income: number[];
+  net_premium: number[];
+  subsidy: number[];
+  fragility_slope: number[];
+  discontinuity_flag: boolean[];
+}
+
+export interface ColumnarDistribution {
+  cost: number[];
+  cumulative_probability: number[];
+}
+
+export type ColumnarRiskPlanProfile = Pick<RiskPlanProfile, "plan_id"> &
+  Partial<Omit<RiskPlanProfile, "plan_id" | "premium_fragility_curve" | "distribution_points">> & {
+    premium_fragility_curve?: ColumnarFragilityCurve;
+    distribution_points?: ColumnarDistribution;
+  };
+
+export interface ColumnarRiskResponse extends Omit<RiskResponse, "plans"> {
+  layout: "columnar";
+  plans: ColumnarRiskPlanProfile[];
+}
+
+export interface RiskQueryOptions {
+  fields?: (keyof RiskPlanProfile)[];
+  curvePoints?: number;
+}
@@ -0,0 +1,260 @@
+"""Offline bulk scoring of registered users against the Gold demo profiles.
+
+Only counties with Gold profiles (Fulton in the demo data) can be scored;
+users elsewhere get no output rows and are counted as unscored.
+
+Streams the users table in id-ordered chunks, scores each chunk in a process
+pool and writes one CSV part file per chunk plus a checkpoint, so an
+interrupted run picks up after the last fully written chunk:
+
+    python scripts/bulk_score.py --db backend/health_insurance.db --out scores/
+
+Users are grouped by scoring key before scoring — the Gold profile key in
+``gold`` mode, profile key plus risk inputs in ``simulate`` mode — and each
+worker caches scored keys. A million users costs a handful of profile loads
+in ``gold`` mode; ``simulate`` mode runs one simulation per distinct key in
+each worker, so its cost grows with the variety of risk inputs. It adds the
+backend cost model's estimates and intervals as extra columns.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import signal
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import risk_store  # noqa: E402
+import simulation  # noqa: E402
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+USER_COLUMNS = (
+    "id", "email", "income_profile", "county",
+    "medication_count", "expected_er_visits", "therapy_frequency",
+)
+
+OUTPUT_COLUMNS = [
+    "user_id", "email", "county", "profile_key", "plan_id", "provider", "metal_tier",
+    "net_premium", "breach_probability", "mean_oop", "p90_exposure",
+    "expected_annual_total_cost",
+]
+
+SIMULATED_METRICS = ("breach_probability", "mean_oop", "p90_exposure")
+INTERVAL_KEYS = ("estimate", "lower", "upper")
+SIMULATION_COLUMNS = [
+    f"simulated_{m}" if key == "estimate" else f"simulated_{m}_{key}"
+    for m in SIMULATED_METRICS
+    for key in INTERVAL_KEYS
+]
+
+
+# ── Worker side ──────────────────────────────────────────────────────────────
+
+_SCORES: dict = {}
+
+
+def _init_worker():
+    # Ctrl-C is handled by the driver, which lets running chunks finish.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    risk_store.preload_profiles()
+
+
+def _risk_inputs(row: dict) -> dict:
+    return {
+        "income_profile": row["income_profile"],
+        "medication_count": row["medication_count"] or 0,
+        "expected_er_visits": row["expected_er_visits"] or 0.0,
+        "therapy_frequency": row["therapy_frequency"] or 0.0,
+        "county": row["county"],
+    }
+
+
+def _score_key(user_dict: dict, mode: str) -> tuple:
+    profile_key = risk_store.match_demo_profile(user_dict)
+    if mode == "gold":
+        return (profile_key,)
+    return (
+        profile_key,
+        user_dict["medication_count"],
+        user_dict["expected_er_visits"],
+        user_dict["therapy_frequency"],
+    )
+
+
+def _score(key: tuple, user_dict: dict, mode: str):
+    data = risk_store.load_profile(key[0], "baseline")
+    if data is None or mode == "gold":
+        return data
+    result = simulation.simulate_plan_metrics(user_dict, data, metrics=SIMULATED_METRICS)
+    return simulation.apply_simulation(data, result)
+
+
+def score_chunk(part: int, rows: list[dict], out_dir: str, mode: str) -> tuple[int, int, int]:
+    """Score one chunk of users and write it as ``part-NNNNN.csv``.
+
+    Returns ``(users, unscored_users, rows_written)``.
+    """
+    path = os.path.join(out_dir, f"part-{part:05d}.csv")
+    tmp_path = path + ".tmp"
+    unscored = 0
+    written = 0
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(OUTPUT_COLUMNS + (SIMULATION_COLUMNS if mode == "simulate" else []))
+        for row in rows:
+            user_dict = _risk_inputs(row)
+            key = _score_key(user_dict, mode)
+            if key not in _SCORES:
+                _SCORES[key] = _score(key, user_dict, mode)
+            plans = _SCORES[key]
+            if plans is None:
+                unscored += 1
+                continue
+            for p in plans:
+                out = [
+                    row["id"], row["email"], row["county"], key[0], p["plan_id"],
+                    p.get("provider"), p.get("metal_tier"), p["net_premium"],
+                    p["breach_probability"], p["mean_oop"], p["p90_exposure"],
+                    p["expected_annual_total_cost"],
+                ]
+                if mode == "simulate":
+                    ci = p.get("confidence_intervals") or {}
+                    out += [ci[m][k] if m in ci else "" for m in SIMULATED_METRICS for k in INTERVAL_KEYS]
+                writer.writerow(out)
+                written += 1
+    os.replace(tmp_path, path)
+    return len(rows), unscored, written
+
+
+# ── Driver ───────────────────────────────────────────────────────────────────
+
+def _read_checkpoint(out_dir: str) -> dict:
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {"last_id": 0, "next_part": 0, "users": 0, "unscored": 0, "rows": 0}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _write_checkpoint(out_dir: str, checkpoint: dict):
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def _iter_chunks(conn: sqlite3.Connection, last_id: int, chunk_size: int):
+    cols = ", ".join(USER_COLUMNS)
+    while True:
+        cursor = conn.execute(
+            f"SELECT {cols} FROM users WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)
+        )
+        rows = [dict(r) for r in cursor.fetchall()]
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield rows, last_id
+
+
+def run(db_path: str, out_dir: str, mode: str, chunk_size: int, workers: int):
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = _read_checkpoint(out_dir)
+    if checkpoint.get("mode", mode) != mode:
+        raise SystemExit(f"Checkpoint in {out_dir} was written in {checkpoint['mode']!r} mode")
+    db = os.path.abspath(db_path)
+    if checkpoint.get("db", db) != db:
+        raise SystemExit(f"Checkpoint in {out_dir} was written from {checkpoint['db']}")
+    checkpoint["mode"] = mode
+    checkpoint["db"] = db
+
+    # Parts past the checkpoint may be partial or from a run that died
+    # mid-flight; they will be rewritten from the checkpoint's last id.
+    for stale in glob.glob(os.path.join(out_dir, "part-*.csv*")):
+        part = int(os.path.basename(stale)[5:10])
+        if part >= checkpoint["next_part"]:
+            os.remove(stale)
+
+    if checkpoint["next_part"]:
+        print(f"Resuming after user id {checkpoint['last_id']} (part {checkpoint['next_part']})")
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    started = time.monotonic()
+    users_this_run = 0
+    next_part = checkpoint["next_part"]
+    pending = {}  # future -> (part, last_id)
+    finished = {}  # part -> (last_id, result), waiting for earlier parts
+
+    def commit_finished():
+        while checkpoint["next_part"] in finished:
+            last_id, (users, unscored, rows) = finished.pop(checkpoint["next_part"])
+            checkpoint["last_id"] = last_id
+            checkpoint["next_part"] += 1
+            checkpoint["users"] += users
+            checkpoint["unscored"] += unscored
+            checkpoint["rows"] += rows
+            _write_checkpoint(out_dir, checkpoint)
+
+    def collect(return_when):
+        nonlocal users_this_run
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            part, last_id = pending.pop(future)
+            result = future.result()
+            users_this_run += result[0]
+            finished[part] = (last_id, result)
+        commit_finished()
+        elapsed = time.monotonic() - started
+        print(
+            f"  {checkpoint['users']:,} users committed "
+            f"({users_this_run / elapsed:,.0f} users/s this run)"
+        )
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        for rows, last_id in _iter_chunks(conn, checkpoint["last_id"], chunk_size):
+            if len(pending) >= 2 * workers:
+                collect(FIRST_COMPLETED)
+            future = pool.submit(score_chunk, next_part, rows, out_dir, mode)
+            pending[future] = (next_part, last_id)
+            next_part += 1
+        while pending:
+            collect(FIRST_COMPLETED)
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun to resume after user id {checkpoint['last_id']}")
+        raise SystemExit(130)
+    finally:
+        # Queued chunks are dropped and running ones finish into part files
+        # past the checkpoint, which the next run clears and rewrites.
+        pool.shutdown(cancel_futures=True)
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    print(
+        f"Done: {checkpoint['users']:,} users, {checkpoint['rows']:,} rows, "
+        f"{checkpoint['unscored']:,} without a Gold profile. "
+        f"This run: {users_this_run:,} users in {elapsed:.1f}s "
+        f"({users_this_run / max(elapsed, 1e-9):,.0f} users/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=os.getenv("DATABASE_URL", "health_insurance.db"))
+    parser.add_argument("--out", required=True, help="output directory for part files and checkpoint")
+    parser.add_argument("--mode", choices=("gold", "simulate"), default="gold")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run(args.db, args.out, args.mode, args.chunk_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()